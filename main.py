@@ -1,5 +1,3 @@
-from src.News  import main_news
-from src.Advisory_reports import main_adreports
 import argparse
 
 if __name__ == "__main__":
@@ -12,8 +10,11 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
+    # Import only the selected pipeline (pandas/openai/oracledb load lazily)
     if args.mode == "news":
+        from src.News import main_news
         main_news.main()
     elif args.mode == "reports":
+        from src.Advisory_reports import main_adreports
         main_adreports.main()
 
@@ -34,6 +34,12 @@ class AdReportsLLMService:
             self.prompts_dir = str(Path(__file__).parent / "prompts")
         else:
             self.prompts_dir = prompts_dir
+        
+        # Load prompts once; each call only concatenates the report text
+        self.system_content = load_prompt('system_prompt', self.prompts_dir)
+        self._user_prefix, self._user_suffix = (
+            load_prompt('extract_reports', self.prompts_dir).split('{report_text}', 1)
+        )
             
         logger.info(f"Reports LLM service initialized, prompts dir: {self.prompts_dir}")
     
@@ -48,16 +54,13 @@ class AdReportsLLMService:
             dict with keys: PROD_ABBR_NAME, PROD_CODE, HOLDING_SUGGEST, TARGET_PRICE,
                             EPS_ESTIMATE, HOUSE_VIEW_MEMBER, HOUSE_VIEW_PUBLIC
         """
-        system_content = load_prompt('system_prompt', self.prompts_dir)
-        
-        user_prompt_template = load_prompt('extract_reports', self.prompts_dir)
-        user_prompt = user_prompt_template.replace('{report_text}', reports_text)
+        user_prompt = self._user_prefix + reports_text + self._user_suffix
         
         _default = {k: None for k in ['PROD_ABBR_NAME', 'PROD_CODE', 'HOLDING_SUGGEST',
                                        'TARGET_PRICE', 'EPS_ESTIMATE', 'HOUSE_VIEW_MEMBER', 'HOUSE_VIEW_PUBLIC']}
         try:
             response = self.llm.call_with_json_schema(
-                system_content, 
+                self.system_content, 
                 user_prompt,
                 max_tokens=2000,
                 temperature=1.0
@@ -67,4 +70,29 @@ class AdReportsLLMService:
             return response
         except Exception as e:
             logger.warning(f"Reports summarization failed: {e}")
-            return _default
\ No newline at end of file
+            return _default
+
+    async def aextract_reports(self, reports_text: str, max_tokens: int = 2000,
+                               temperature: float = 1.0) -> dict:
+        """
+        Async version of extract_reports, for concurrent fan-out.
+        
+        API / timeout / JSON errors are raised to the caller.
+        
+        Args:
+            reports_text: Reports text content
+            max_tokens: Maximum number of completion tokens
+            temperature: Temperature parameter
+            
+        Returns:
+            dict with keys: PROD_ABBR_NAME, PROD_CODE, HOLDING_SUGGEST, TARGET_PRICE,
+                            EPS_ESTIMATE, HOUSE_VIEW_MEMBER, HOUSE_VIEW_PUBLIC
+        """
+        user_prompt = self._user_prefix + reports_text + self._user_suffix
+        
+        return await self.llm.acall_with_json_schema(
+            self.system_content,
+            user_prompt,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
@@ -3,30 +3,120 @@ News Processing Service Module
 Handles news data query, processing and tagging
 """
 from datetime import date, timedelta
+import json
+import asyncio
 import logging
-from unittest import result
-from openai import AzureOpenAI
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import List, Tuple, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
+from openai import APIError
 import sys
 import os
-import json
+import zipfile
 import requests
 
-import win32com.client
-from docx import Document
+from lxml import etree
 from pypandoc import convert_file
 
 # Import utility functions
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils.utils import load_prompt
+from utils.utils import load_prompt, save_csv, ensure_dir
 from src.Advisory_reports.adreports_llm import AdReportsLLMService  # ← 新增
 
 logger = logging.getLogger(__name__)
 
+# Fields extracted from each report by the LLM
+REPORT_COLUMNS = ['PROD_ABBR_NAME', 'PROD_CODE', 'HOLDING_SUGGEST', 'TARGET_PRICE',
+                  'EPS_ESTIMATE', 'HOUSE_VIEW_MEMBER', 'HOUSE_VIEW_PUBLIC']
+
+# Errors that fail a single report; anything else is a bug and propagates
+_LLM_ERRORS = (APIError, asyncio.TimeoutError, json.JSONDecodeError, ValueError)
+
+# WordprocessingML 標籤 (Clark notation)
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY, _W_P, _W_R, _W_HYPERLINK = f'{_W}body', f'{_W}p', f'{_W}r', f'{_W}hyperlink'
+_W_T, _W_TAB, _W_PTAB, _W_BR, _W_CR = f'{_W}t', f'{_W}tab', f'{_W}ptab', f'{_W}br', f'{_W}cr'
+_W_NO_BREAK_HYPHEN, _W_TYPE = f'{_W}noBreakHyphen', f'{_W}type'
+
+# 報告為外部上傳檔案：不解析實體、不連網、不放寬樹大小限制
+_XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=False)
+
+
+def _run_text(run: Any) -> str:
+    """
+    Text of one w:r element, same as python-docx Run.text.
+    
+    Args:
+        run: w:r element
+        
+    Returns:
+        Run text
+    """
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W_T:
+            parts.append(child.text or "")
+        elif tag in (_W_TAB, _W_PTAB):
+            parts.append("\t")
+        elif tag == _W_CR or (tag == _W_BR and child.get(_W_TYPE, 'textWrapping') == 'textWrapping'):
+            parts.append("\n")
+        elif tag == _W_NO_BREAK_HYPHEN:
+            parts.append("-")
+    return "".join(parts)
+
+
+def _docx_plain_text(file_path: str) -> str:
+    """
+    Extract body paragraph text straight from word/document.xml.
+    
+    Same result as "".join(p.text for p in docx.Document(path).paragraphs),
+    without building the python-docx object model (styles, numbering, parts).
+    
+    Args:
+        file_path: docx file path
+        
+    Returns:
+        Concatenated paragraph text
+    """
+    with zipfile.ZipFile(file_path) as docx_zip:
+        root = etree.fromstring(docx_zip.read('word/document.xml'), parser=_XML_PARSER)
+    
+    body = root.find(_W_BODY)
+    if body is None:
+        return ""
+    
+    # 與 python-docx 相同：僅取 body 直屬段落中的 w:r 與 w:hyperlink/w:r
+    parts = []
+    for para in body.iterfind(_W_P):
+        for child in para:
+            if child.tag == _W_R:
+                parts.append(_run_text(child))
+            elif child.tag == _W_HYPERLINK:
+                parts.extend(_run_text(run) for run in child.iterfind(_W_R))
+    return "".join(parts)
+
+
+def _extract_one(file_path: str, type: str = 'plain_text') -> str:
+    """
+    Extract text from one docx file (module level so worker processes can pickle it).
+    
+    Args:
+        file_path: docx file path
+        type: 'plain_text' for paragraph text, otherwise pandoc markdown
+        
+    Returns:
+        Extracted text
+    """
+    if type == 'plain_text':
+        return _docx_plain_text(file_path)
+    
+    return convert_file(file_path, "md", format = "docx",
+                        extra_args=["--standalone", "--wrap=none"])
+
 
 class AdReports_process:
     """Advisory Reports Processing Service"""
@@ -42,116 +132,87 @@ class AdReports_process:
             queries_dir: Directory containing SQL query templates
         """
         self.db = db_manager
-        self.client = advisory_reports_llm_service.client
+        self.llm = advisory_reports_llm_service
         self.config = config
         # Set queries_dir relative to this file's location if not provided
         self.queries_dir = str(Path(__file__).parent / "queries")
         self.subject_keyword = config.get('subject_keyword', '')
-        self.num_workers = config.get('num_workers', 8)
+        self.max_concurrency = config.get('max_concurrency', config.get('num_workers', 8))
+        self.extract_workers = config.get('extract_workers') or os.cpu_count() or 1
         self.timeout = config.get('timeout', 60)
-
-        prompts_dir = Path(__file__).parent / "prompts"
-        with open(prompts_dir / "system_prompt.txt", 'r', encoding='utf-8') as f:
-            self.system_prompt = f.read()
-        with open(prompts_dir / "extract_reports.txt", 'r', encoding='utf-8') as f:
-            self.content_prompt = f.read()
     
     def _extract_text_from_docx(self, path: str, type = 'plain_text'):
         ## extract_text_from_docx output
-        full_text = []
+        # scandir 的 DirEntry 已帶檔案類型，不需逐檔 stat；略過 Word 暫存檔 (~$*.docx)
+        with os.scandir(path) as entries:
+            files = sorted(entry.path for entry in entries
+                           if entry.is_file()
+                           and entry.name.lower().endswith('.docx')
+                           and not entry.name.startswith('~$'))
+        if not files:
+            return []
 
-        if type == 'plain_text':
-            for i in os.listdir(path):
-                print(path + '/' + i)
-                doc = Document(path + '/' + i)
-                
-                text = ""
-                for para in doc.paragraphs:
-                    text = text + para.text
+        # docx 解析為 CPU-bound，以多程序平行處理（結果順序與 files 相同）
+        with ProcessPoolExecutor(max_workers=min(self.extract_workers, len(files))) as executor:
+            full_text = list(executor.map(_extract_one, files, [type] * len(files)))
 
-                full_text.append(text)
-
-        else:
-            for i in os.listdir(path):
-                print(path + '/' + i)
-                md = convert_file(path + '/' + i, "md", format = "docx",
-                            extra_args=["--standalone", "--wrap=none"])   
-                full_text.append(md)
+        empty = sum(1 for text in full_text if not text)
+        logger.info(f"Extracted {len(full_text)} advisory reports from {path}, empty: {empty}")
 
         return full_text
     
-    def _call_AOAI_api_report_summary(self, args):
-        """處理單個投顧報告項目的函數."""
-        idx, report_text, client = args
-
-        system_prompt = self.system_prompt
-        content_prompt = self.content_prompt
-        user_content = content_prompt.replace("{report_text}", report_text)
+    async def _process_single_report(self, semaphore: asyncio.Semaphore,
+                                     idx: int, report_text: str) -> Tuple[int, str, dict]:
+        """
+        Process single advisory report (bounded by semaphore).
         
+        Args:
+            semaphore: Semaphore limiting in-flight requests
+            idx: Report index
+            report_text: Report text content
+            
+        Returns:
+            (idx, report_text, col_info), fields are "無" if the call failed
+        """
         logger.debug(f"Processing report {idx}")
-
-        try:
-            response = client.chat.completions.create(
-                messages=[
-                    { "role": "system", "content": system_prompt, },
-                    { "role": "user", "content": user_content }
-                ],
-                max_tokens=self.config.get('max_tokens', 5000),
-                temperature=self.config.get('temperature', 0.5),
-                top_p=1.0,
-                model = self.config.get('model', "gpt-4o"),
-                response_format={"type": "json_object"}
-            )
+        
+        async with semaphore:
+            try:
+                results = await self.llm.aextract_reports(
+                    report_text,
+                    max_tokens=self.config.get('max_tokens', 5000),
+                    temperature=self.config.get('temperature', 0.5)
+                )
+                return idx, report_text, {key: results.get(key, "無") for key in REPORT_COLUMNS}
             
-            results = json.loads(response.choices[0].message.content)
-
-            return idx, report_text, {
-                key: results.get(key, "無")
-                for key in [
-                    'PROD_ABBR_NAME', 'PROD_CODE', 'HOLDING_SUGGEST', 'TARGET_PRICE',
-                    'EPS_ESTIMATE', 'HOUSE_VIEW_MEMBER', 'HOUSE_VIEW_PUBLIC'
-                ]
-            }
-
-        except Exception as e:
-            logger.warning(f"處理第 {idx} 筆報告失敗: {str(e)}")
-            return idx, report_text, {
-                key: "無"
-                for key in [
-                    'PROD_ABBR_NAME', 'PROD_CODE', 'HOLDING_SUGGEST', 'TARGET_PRICE',
-                    'EPS_ESTIMATE', 'HOUSE_VIEW_MEMBER', 'HOUSE_VIEW_PUBLIC'
-                ]
-            }
+            except _LLM_ERRORS as e:
+                logger.warning(f"處理第 {idx} 筆報告失敗: {str(e)}")
+                return idx, report_text, {key: "無" for key in REPORT_COLUMNS}
     
-    def _process_adreports_parallel(self, Tool, reports, client):
-        # 準備任務清單（支援傳入 Series 或 list）
-        tasks = [(i, reports[i], client) for i in range(len(reports))]
-        
-        results = []
+    async def _aprocess_adreports(self, reports: List[str]) -> pd.DataFrame:
+        """
+        Process advisory reports concurrently.
         
-        with ThreadPoolExecutor(max_workers = self.num_workers) as executor:
-            # 提交所有任務並建立 future->idx 映射
-            submit_tasks = {executor.submit(Tool, task): task[0] for task in tasks}
+        Args:
+            reports: Report text contents
             
-            # 顯示進度條 (as_completed 會回傳完成的 Future)
-            for submit_task in tqdm(as_completed(submit_tasks), total=len(tasks), desc="投顧報告處理進度"):
-                idx = submit_tasks[submit_task]
-                try:
-                    idx, report_text, col_info = submit_task.result(timeout=self.timeout)
-                    results.append((idx, report_text, col_info))
-                
-                except Exception as e:
-                    logger.warning(f"處理第 {idx} 筆報告失敗: {str(e)}")
-                    pass
-        
-        # 按原始順序排序結果
-        results.sort(key=lambda x: x[0])
+        Returns:
+            DataFrame with house_view_report and the REPORT_COLUMNS fields
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = [self._process_single_report(semaphore, i, report_text)
+                 for i, report_text in enumerate(reports)]
+        
+        # 依 idx 直接寫入預先配置的陣列，不需再排序
+        col_info = np.empty(len(reports), dtype=object)
+        for task in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="投顧報告處理進度"):
+            idx, _, info = await task
+            col_info[idx] = info
         
         # 建立 DataFrame
-        if results:
-            _, report_text, col_info = zip(*results)
-            reports_summaries = pd.DataFrame(col_info)
-            reports_summaries.insert(0, "house_view_report", report_text)
+        if len(reports):
+            reports_summaries = pd.DataFrame(list(col_info), columns=REPORT_COLUMNS)
+            reports_summaries.insert(0, "house_view_report", reports)
         else:
             reports_summaries = pd.DataFrame()
 
@@ -184,11 +245,7 @@ class AdReports_process:
             logger.warning("No advisory reports, ending processing")
             return pd.DataFrame()
 
-        reports_summaries = self._process_adreports_parallel(
-                                    Tool = self._call_AOAI_api_report_summary
-                                    , reports = reports_texts
-                                    , client = self.client
-                                )
+        reports_summaries = asyncio.run(self._aprocess_adreports(reports_texts))
         
         reports_summaries['SNAP_DATE'] = date_end
         reports_summaries['SNAP_YYYYMM'] = date_end.replace('/', '')[:6]
@@ -214,14 +271,14 @@ class AdReports_process:
         Returns:
             Saved file path
         """
-        os.makedirs(output_dir, exist_ok=True)
+        ensure_dir(output_dir)
         
         # Generate filename
         filename = f"投顧報告摘要_{date_end.replace('/', '')}.csv"
         filepath = os.path.join(output_dir, filename)
         
         # Save
-        df_adreports.to_csv(filepath, index=False, encoding='utf-8-sig')
+        save_csv(df_adreports, filepath)
         logger.info(f"Data saved to: {filepath}")
         
         return filepath
@@ -8,7 +8,7 @@ from src.Advisory_reports.adreports_process import AdReports_process
 from src.Advisory_reports.adreports_llm import AdReportsLLMService
 from utils.database import DatabaseManager
 from utils.llm_service import LLMService
-from utils.utils import setup_logging, load_config, load_env_variables, get_date_range
+from utils.utils import setup_logging, load_config, load_env_variables, get_date_range, ensure_dir
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +16,7 @@ def main():
     """
     Main entry point for AIPRO News Processing System.
     """
+    db_manager = None
     try:
         # 1. setup configuration
         config = load_config("./config/config.yaml")
@@ -31,8 +32,8 @@ def main():
         start_time = datetime.now()
 
         # 3. Ensure required directories exist
-        os.makedirs(config['paths']['reports_outputs_dir'], exist_ok=True)
-        os.makedirs(config['paths']['logs_dir'], exist_ok=True)
+        ensure_dir(config['paths']['reports_outputs_dir'])
+        ensure_dir(config['paths']['logs_dir'])
         
         # 4. Get date range
         date_bgn, date_end = get_date_range()
@@ -46,7 +47,10 @@ def main():
             host=config['database']['host'],
             port=config['database']['port'],
             service_name=config['database']['service_name'],
-            oracle_client_path=config['database']['oracle_client_path']
+            oracle_client_path=config['database']['oracle_client_path'],
+            array_size=config['database'].get('array_size', 10000),
+            pool_max=config['database'].get('pool_max', 4),
+            stmtcache_size=config['database'].get('stmtcache_size', 40)
         )
         
         # 6. Initialize LLM service
@@ -59,6 +63,19 @@ def main():
             max_tokens=config['azure_openai']['max_tokens'],
             temperature=config['azure_openai']['temperature'],
             timeout=config['news']['timeout'],
+            rpm=config['azure_openai'].get('rpm'),
+            tpm=config['azure_openai'].get('tpm'),
+            max_retries=config['azure_openai'].get('max_retries', 5),
+            retry_max_delay=config['azure_openai'].get('retry_max_delay', 30),
+            cache_path=config['azure_openai'].get('cache_path'),
+            cache_ttl_days=config['azure_openai'].get('cache_ttl_days', 14),
+            max_connections=config['azure_openai'].get('max_connections', 256),
+            prompt_cache_key=config['azure_openai'].get('prompt_cache_key'),
+            strict_json_schema=config['azure_openai'].get('strict_json_schema', False),
+            extra_endpoints=[
+                {**e, 'api_key': os.getenv(e.get('api_key_env', 'AOAI_API_KEY')) or ''}
+                for e in config['azure_openai'].get('extra_endpoints') or []
+            ],
         )
   
         # 7. Initialize advisory reports LLM service (specific)  # ← 新增
@@ -98,6 +115,11 @@ def main():
         
     except Exception as e:
         logger.error(f"Program execution failed: {e}", exc_info=True)
+        
+    finally:
+        # Release pooled sessions even when fetch or processing failed
+        if db_manager is not None:
+            db_manager.close()
 
 
 if __name__ == "__main__":
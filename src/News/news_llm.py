@@ -2,9 +2,11 @@
 News-specific LLM Operations Module
 Handles news-related LLM tasks (extraction, summarization)
 """
+import json
 import logging
+import fastjsonschema
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Callable, Optional
 
 # Import utility functions
 import sys
@@ -14,6 +16,58 @@ from utils.utils import load_prompt
 
 logger = logging.getLogger(__name__)
 
+# Output schemas (constant across calls, keeps the prompt prefix byte-identical)
+_SUMMARY_SCHEMA = '{"PROD_ABBR_NAME": "string", "PROD_CODE":"string", "NEWS_SUMMARY":"string","LABELS":"array"}'
+_SUMMARY_MULTI_SCHEMA = ('{"results": [{"IDX": "integer", "PROD_ABBR_NAME": "string", "PROD_CODE":"string", '
+                         '"NEWS_SUMMARY":"string","LABELS":"array"}]}')
+# Completion budget per article: ~150 CJK chars of summary, ~10 labels and
+# the JSON keys fit in ~400 tokens; a tight cap lowers decode latency
+_MAX_TOKENS_PER_NEWS = 600
+_MAX_TOKENS_MULTI = 16000
+# Validators compiled once at import; nulls are allowed (no matching stock)
+_SUMMARY_ITEM_SCHEMA = {
+    "type": "object",
+    "required": ["PROD_ABBR_NAME", "PROD_CODE", "NEWS_SUMMARY", "LABELS"],
+    "properties": {
+        "PROD_ABBR_NAME": {"type": ["string", "null"]},
+        "PROD_CODE": {"type": ["string", "null"]},
+        "NEWS_SUMMARY": {"type": ["string", "null"]},
+        "LABELS": {"type": ["array", "null"], "items": {"type": "string"}},
+    },
+}
+_validate_summary = fastjsonschema.compile(_SUMMARY_ITEM_SCHEMA)
+_validate_summary_multi = fastjsonschema.compile({
+    "type": "object",
+    "required": ["results"],
+    "properties": {"results": {"type": "array"}},
+})
+# Strict structured-output schemas (all keys required, no extra keys)
+_SUMMARY_RESPONSE_SCHEMA = {
+    "name": "news_summary",
+    "schema": {**_SUMMARY_ITEM_SCHEMA, "additionalProperties": False},
+}
+_SUMMARY_MULTI_RESPONSE_SCHEMA = {
+    "name": "news_summary_multi",
+    "schema": {
+        "type": "object",
+        "required": ["results"],
+        "additionalProperties": False,
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["IDX"] + _SUMMARY_ITEM_SCHEMA["required"],
+                    "additionalProperties": False,
+                    "properties": {"IDX": {"type": "integer"}, **_SUMMARY_ITEM_SCHEMA["properties"]},
+                },
+            },
+        },
+    },
+}
+# Extra user message when re-asking after a malformed JSON response
+_JSON_RETRY_HINT = "請僅回傳符合上述 json schema 的合法 JSON，不得包含任何其他文字。"
+
 
 class NewsLLMService:
     """News-specific LLM Service"""
@@ -33,10 +87,37 @@ class NewsLLMService:
             self.prompts_dir = str(Path(__file__).parent / "prompts")
         else:
             self.prompts_dir = prompts_dir
+        
+        # Load prompts once and split user templates around {news_text}.
+        # The instructions before the news text are sent as their own user
+        # message, byte-identical across calls, so the provider caches them
+        self.system_content = load_prompt('system_financial_tagger', self.prompts_dir)
+        self._user_prefix, self._user_suffix = (
+            load_prompt('summarize_news', self.prompts_dir)
+            .replace('{json_schema}', _SUMMARY_SCHEMA)
+            .split('{news_text}', 1)
+        )
+        self._multi_prefix, self._multi_suffix = (
+            load_prompt('summarize_news_multi', self.prompts_dir)
+            .replace('{json_schema}', _SUMMARY_MULTI_SCHEMA)
+            .split('{news_text}', 1)
+        )
             
         logger.info(f"News LLM service initialized, prompts dir: {self.prompts_dir}")
 
 
+    def _build_user_prompt(self, news_text: str) -> List[str]:
+        """
+        Build the user messages for a single news article.
+        
+        Args:
+            news_text: News text content
+            
+        Returns:
+            [invariant instructions, news text]
+        """
+        return [self._user_prefix, news_text + self._user_suffix]
+
     def summarize_news(self, news_text: str) -> dict:
         """
         Extract stock info, generate news summary, and produce labels.
@@ -47,22 +128,159 @@ class NewsLLMService:
         Returns:
             dict with keys: PROD_ABBR_NAME, PROD_CODE, NEWS_SUMMARY, LABELS
         """
-        system_content = load_prompt('system_financial_tagger', self.prompts_dir)
-        json_schema = '{"PROD_ABBR_NAME": "string", "PROD_CODE":"string", "NEWS_SUMMARY":"string","LABELS":"array"}'
-        
-        user_prompt_template = load_prompt('summarize_news', self.prompts_dir)
-        user_prompt = user_prompt_template.replace('{json_schema}', json_schema).replace('{news_text}', news_text)
+        user_prompt = self._build_user_prompt(news_text)
         
         try:
             response = self.llm.call_with_json_schema(
-                system_content, 
+                self.system_content, 
                 user_prompt,
-                max_tokens=2000,
-                temperature=1.0
+                max_tokens=_MAX_TOKENS_PER_NEWS,
+                temperature=1.0,
+                response_schema=_SUMMARY_RESPONSE_SCHEMA
             )
             if response is None:
                 return {"PROD_ABBR_NAME": None, "PROD_CODE": None, "NEWS_SUMMARY": None, "LABELS": None}
             return response
         except Exception as e:
             logger.warning(f"News summarization failed: {e}")
-            return {"PROD_ABBR_NAME": None, "PROD_CODE": None, "NEWS_SUMMARY": None, "LABELS": None}
\ No newline at end of file
+            return {"PROD_ABBR_NAME": None, "PROD_CODE": None, "NEWS_SUMMARY": None, "LABELS": None}
+
+    async def _acall_json(self, user_prompt: List[str], max_tokens: int,
+                          validate: Optional[Callable[[Any], Any]] = None,
+                          response_schema: Optional[Dict[str, Any]] = None,
+                          bypass_cache: bool = False) -> Dict[str, Any]:
+        """
+        Call LLM, re-asking once at temperature 0 if the response is not valid
+        JSON or does not match the schema.
+        
+        Args:
+            user_prompt: User messages
+            max_tokens: Maximum number of completion tokens
+            validate: Compiled schema validator (raises JsonSchemaException)
+            response_schema: Strict structured-output schema for the request
+            bypass_cache: Skip the response cache lookup
+            
+        Returns:
+            Parsed JSON response
+        """
+        try:
+            response = await self.llm.acall_with_json_schema(
+                self.system_content,
+                user_prompt,
+                max_tokens=max_tokens,
+                temperature=1.0,
+                bypass_cache=bypass_cache,
+                response_schema=response_schema,
+                validate=validate
+            )
+            return response
+        except (json.JSONDecodeError, fastjsonschema.JsonSchemaException) as e:
+            logger.warning(f"Invalid JSON response ({type(e).__name__}), re-asking once at temperature 0")
+            response = await self.llm.acall_with_json_schema(
+                self.system_content,
+                user_prompt + [_JSON_RETRY_HINT],
+                max_tokens=max_tokens,
+                temperature=0,
+                bypass_cache=True,
+                response_schema=response_schema,
+                validate=validate
+            )
+            return response
+
+    async def asummarize_news(self, news_text: str, bypass_cache: bool = False) -> dict:
+        """
+        Async version of summarize_news, for concurrent fan-out.
+        
+        API / timeout errors and a second invalid JSON response are raised
+        to the caller, which records them as failures.
+        
+        Args:
+            news_text: News text content
+            bypass_cache: Skip the response cache lookup (retry pass)
+            
+        Returns:
+            dict with keys: PROD_ABBR_NAME, PROD_CODE, NEWS_SUMMARY, LABELS
+        """
+        user_prompt = self._build_user_prompt(news_text)
+        
+        return await self._acall_json(user_prompt, max_tokens=_MAX_TOKENS_PER_NEWS,
+                                      validate=_validate_summary,
+                                      response_schema=_SUMMARY_RESPONSE_SCHEMA,
+                                      bypass_cache=bypass_cache)
+
+    async def asummarize_news_multi(self, news_items: List[Tuple[int, str]],
+                                    bypass_cache: bool = False) -> Dict[int, dict]:
+        """
+        Summarize several news articles in one LLM call (row-marshaling).
+        
+        Args:
+            news_items: List of (idx, news_text)
+            bypass_cache: Skip the response cache lookup (retry pass)
+            
+        Returns:
+            {idx: dict with keys PROD_ABBR_NAME, PROD_CODE, NEWS_SUMMARY, LABELS};
+            articles missing from the response are omitted
+        """
+        # Articles are numbered by their position in this request, not the global idx
+        news_text = "\n".join(f"---IDX={pos}---\n{text}" for pos, (_, text) in enumerate(news_items))
+        user_prompt = [self._multi_prefix, news_text + self._multi_suffix]
+        
+        max_tokens = min(_MAX_TOKENS_PER_NEWS * len(news_items), _MAX_TOKENS_MULTI)
+        response = await self._acall_json(user_prompt, max_tokens=max_tokens,
+                                          validate=_validate_summary_multi,
+                                          response_schema=_SUMMARY_MULTI_RESPONSE_SCHEMA,
+                                          bypass_cache=bypass_cache)
+        
+        results = {}
+        for item in response['results']:
+            try:
+                pos = int(item.pop('IDX'))
+                _validate_summary(item)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                # JsonSchemaException is a ValueError
+                continue
+            if 0 <= pos < len(news_items):
+                results[news_items[pos][0]] = item
+        
+        if len(results) < len(news_items):
+            logger.warning(f"Marshaled response returned {len(results)}/{len(news_items)} articles")
+        return results
+
+    def summarize_news_batch(self, news_texts: List[str], poll_interval: int = 30,
+                             max_requests: int = 50000) -> List[dict]:
+        """
+        Summarize news via the Batch API (for non-interactive daily runs).
+        
+        Inputs larger than max_requests are split into several batch jobs,
+        all submitted before any is polled so they run concurrently. Responses
+        are validated like the async path; a failed or expired job only leaves
+        its own articles as None, for the caller's retry pass.
+        
+        Args:
+            news_texts: News text contents
+            poll_interval: Batch status polling interval in seconds
+            max_requests: Maximum requests per batch job (Azure caps an input file)
+            
+        Returns:
+            List of result dicts aligned with news_texts (None for failed requests
+            and empty texts)
+        """
+        # Empty / NULL texts are not submitted and stay None, as on the async path
+        prompts = [(str(i), self.system_content, self._build_user_prompt(text))
+                   for i, text in enumerate(news_texts)
+                   if isinstance(text, str) and text]
+        
+        batch_ids = [self.llm.submit_batch(prompts[j:j + max_requests],
+                                           max_tokens=_MAX_TOKENS_PER_NEWS, temperature=1.0,
+                                           response_schema=_SUMMARY_RESPONSE_SCHEMA)
+                     for j in range(0, len(prompts), max_requests)]
+        results = {}
+        for batch_id in batch_ids:
+            results.update(self.llm.poll_batch(batch_id, interval=poll_interval,
+                                               validate=_validate_summary))
+        
+        n_missing = sum(1 for custom_id, _, _ in prompts if results.get(custom_id) is None)
+        if n_missing:
+            logger.warning(f"Batch API returned no valid result for {n_missing} of {len(prompts)} articles")
+        
+        return [results.get(str(i)) for i in range(len(news_texts))]
@@ -4,19 +4,41 @@ Handles connection and data retrieval from Oracle ODS database
 """
 import time
 import logging
+import threading
+import numpy as np
 import pandas as pd
 import oracledb
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Optional
+from typing import Optional, Iterator, Dict, Any
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional, only needed for the DataFrame fetch path
+    pa = None
 
 logger = logging.getLogger(__name__)
 _oracle_client_initialized = False
 
+# Connection.fetch_df_all() (direct Arrow fetch) is available from oracledb 3.0
+_ORACLEDB_VERSION = tuple(int(p) for p in oracledb.__version__.split('.')[:2])
+_HAS_FETCH_DF = _ORACLEDB_VERSION >= (3, 0) and pa is not None
+
+# NumPy dtypes for row-fetched columns with a fixed Python type (others are inferred by pandas).
+# DATE / TIMESTAMP are left to pandas: a datetime64[ns] cast silently wraps dates outside
+# 1677-2262, e.g. the common 9999-12-31 "no end date" value
+_NUMPY_DTYPES = {
+    oracledb.DB_TYPE_BINARY_DOUBLE: np.float64,
+    oracledb.DB_TYPE_BINARY_FLOAT: np.float64,
+}
+
 class DatabaseManager:
     """Oracle Database Manager"""
     
     def __init__(self, account: str, password: str, host: str, port: str, 
-                 service_name: str, oracle_client_path: str) -> None:
+                 service_name: str, oracle_client_path: str,
+                 array_size: int = 10000, pool_max: int = 4,
+                 stmtcache_size: int = 40) -> None:
         """
         Initialize database manager.
         
@@ -27,6 +49,9 @@ class DatabaseManager:
             port: Port number
             service_name: Service name
             oracle_client_path: Oracle Client path
+            array_size: Rows fetched per round trip
+            pool_max: Maximum number of pooled connections
+            stmtcache_size: Statements cached per connection (reused without a parse)
         """
         global _oracle_client_initialized
 
@@ -36,6 +61,11 @@ class DatabaseManager:
         self.port = port
         self.service_name = service_name
         self.oracle_client_path = oracle_client_path
+        self.array_size = array_size
+        self.pool_max = pool_max
+        self.stmtcache_size = stmtcache_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
         
         # Initialize Oracle Client (only once globally)
         if not _oracle_client_initialized:
@@ -47,11 +77,49 @@ class DatabaseManager:
                 logger.error(f"Oracle Client initialization failed: {e}")
                 logger.error(f"Path: {oracle_client_path}")
                 raise
+        
+        # Return CLOB/BLOB content as str/bytes directly in the fetch,
+        # instead of LOB locators that need an extra round trip to read
+        oracledb.defaults.fetch_lobs = False
+        # Pooled connections keep their statement cache, so repeated bound
+        # queries skip the parse round trip
+        oracledb.defaults.stmtcachesize = stmtcache_size
+    
+    def get_pool(self) -> oracledb.ConnectionPool:
+        """
+        Get the connection pool, creating it on first use.
+        
+        Returns:
+            Connection pool shared by all queries of this manager
+        """
+        # Double-checked: fetch_dataframe_parallel workers may race on first use
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = oracledb.create_pool(
+                        user=self.account,
+                        password=self.password,
+                        dsn=f"{self.host}:{self.port}/{self.service_name}",
+                        min=1,
+                        max=self.pool_max,
+                        increment=1,
+                        stmtcachesize=self.stmtcache_size
+                    )
+                    logger.info(f"Database connection pool created, max: {self.pool_max}")
+        return self._pool
+    
+    def close(self) -> None:
+        """Close the connection pool, if created."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+                logger.debug("Database connection pool closed")
     
     @contextmanager
     def get_connection(self):
         """
-        Get database connection as context manager.
+        Get pooled database connection as context manager.
         
         Yields:
             Database connection object
@@ -59,12 +127,8 @@ class DatabaseManager:
         dsn = f"{self.host}:{self.port}/{self.service_name}"
         conn = None
         try:
-            conn = oracledb.connect(
-                user=self.account,
-                password=self.password,
-                dsn=dsn
-            )
-            logger.debug("Database connection established successfully")
+            conn = self.get_pool().acquire()
+            logger.debug("Database connection acquired from pool")
             yield conn
         except Exception as e:
             logger.error(f"Database connection failed: {e}")
@@ -75,16 +139,19 @@ class DatabaseManager:
         finally:
             if conn:
                 conn.close()
-                logger.debug("Database connection closed")
+                logger.debug("Database connection released to pool")
     
     
-    def fetch_dataframe(self, query: str, process_clob: bool = True) -> pd.DataFrame:
+    def fetch_dataframe(self, query: str, binds: Optional[Dict[str, Any]] = None,
+                        array_size: Optional[int] = None) -> pd.DataFrame:
         """
         Execute SQL query and return DataFrame (generic method).
         
         Args:
             query: SQL query statement
-            process_clob: Auto-read CLOB field content (default True)
+            binds: Bind variable values (keeps the statement text constant so
+                   Oracle reuses the parsed cursor)
+            array_size: Rows per round trip for this query (None uses the default)
             
         Returns:
             Query result as DataFrame
@@ -93,36 +160,11 @@ class DatabaseManager:
         
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(query)
+                df = self._fetch_df(conn, query, binds, array_size)
                 
-                # Get column names
-                columns = [desc[0] for desc in cursor.description]
-                
-                # Get data
-                rows = cursor.fetchall()
-                
-                if not rows:
+                if len(df) == 0:
                     logger.warning("Query result is empty")
-                    return pd.DataFrame(columns=columns)
-                
-                # Process data (support CLOB)
-                if process_clob:
-                    processed_rows = []
-                    for row in rows:
-                        processed_row = []
-                        for cell in row:
-                            if hasattr(cell, 'read'):
-                                processed_row.append(cell.read())
-                            else:
-                                processed_row.append(cell)
-                        processed_rows.append(processed_row)
-                    data = processed_rows
-                else:
-                    data = rows
-                
-                # Create DataFrame
-                df = pd.DataFrame(data, columns=columns)
+                    return df
                 
                 elapsed_time = time.time() - start_time
                 logger.info(f"Query completed, {len(df)} rows, elapsed time {elapsed_time:.2f}s")
@@ -131,4 +173,159 @@ class DatabaseManager:
                 
         except Exception as e:
             logger.error(f"Query execution failed: {e}")
-            raise
\ No newline at end of file
+            raise
+    
+    def fetch_dataframe_parallel(self, query: str, binds: Optional[Dict[str, Any]] = None,
+                                 n: int = 4, array_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Execute SQL query as n ROWID-hash partitions on pooled connections.
+        
+        The query must end with a WHERE clause over a single table, since the
+        partition predicate is appended as "AND MOD(ORA_HASH(ROWID), n) = i".
+        
+        Args:
+            query: SQL query statement
+            binds: Bind variable values
+            n: Number of partitions (concurrency is capped by pool_max)
+            array_size: Rows per round trip for this query (None uses the default)
+            
+        Returns:
+            Query result as DataFrame
+        """
+        if n <= 1:
+            return self.fetch_dataframe(query, binds, array_size)
+        
+        start_time = time.time()
+        part_query = f"{query}\n AND MOD(ORA_HASH(ROWID), :part_n) = :part_i"
+        
+        def fetch_partition(i: int) -> pd.DataFrame:
+            with self.get_connection() as conn:
+                return self._fetch_df(conn, part_query, {**(binds or {}), 'part_n': n, 'part_i': i},
+                                      array_size)
+        
+        try:
+            # OCI calls release the GIL, so the partitions are fetched concurrently
+            with ThreadPoolExecutor(max_workers=min(n, self.pool_max)) as executor:
+                parts = list(executor.map(fetch_partition, range(n)))
+        except Exception as e:
+            logger.error(f"Parallel query execution failed: {e}")
+            raise
+        
+        df = pd.concat(parts, ignore_index=True)
+        elapsed_time = time.time() - start_time
+        logger.info(f"Parallel query completed, {n} partitions, {len(df)} rows, "
+                    f"elapsed time {elapsed_time:.2f}s")
+        
+        return df
+    
+    def fetch_dataframe_batches(self, query: str, binds: Optional[Dict[str, Any]] = None,
+                                batch_size: int = 5000) -> Iterator[pd.DataFrame]:
+        """
+        Execute SQL query and yield the result in DataFrame batches.
+        
+        Peak memory stays at O(batch_size) rows, and callers can start
+        processing the first batch while the rest is still being fetched.
+        Falls back to a single fetch_dataframe() batch when the Arrow
+        fetch path is unavailable.
+        
+        Args:
+            query: SQL query statement
+            binds: Bind variable values
+            batch_size: Rows per yielded DataFrame
+            
+        Yields:
+            Query result batches as DataFrame
+        """
+        if not _HAS_FETCH_DF:
+            yield self.fetch_dataframe(query, binds)
+            return
+        
+        start_time = time.time()
+        total_rows = 0
+        
+        try:
+            with self.get_connection() as conn:
+                for odf in conn.fetch_df_batches(statement=query, parameters=binds,
+                                                 size=batch_size):
+                    df = pa.table(odf).to_pandas()
+                    total_rows += len(df)
+                    yield df
+                
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            raise
+        
+        elapsed_time = time.time() - start_time
+        logger.info(f"Batched query completed, {total_rows} rows, elapsed time {elapsed_time:.2f}s")
+    
+    def _fetch_df(self, conn: oracledb.Connection, query: str,
+                  binds: Optional[Dict[str, Any]] = None,
+                  array_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Fetch full query result on an open connection.
+        
+        Args:
+            conn: Database connection
+            query: SQL query statement
+            binds: Bind variable values
+            array_size: Rows per round trip for this query (None uses the default)
+            
+        Returns:
+            Query result as DataFrame
+        """
+        if _HAS_FETCH_DF:
+            # Fetch straight into Arrow; CLOBs are read by the driver in C
+            odf = conn.fetch_df_all(statement=query, parameters=binds,
+                                    arraysize=array_size or self.array_size)
+            return pa.table(odf).to_pandas()
+        return self._fetch_rows(conn, query, binds, array_size)
+    
+    def _fetch_rows(self, conn: oracledb.Connection, query: str,
+                    binds: Optional[Dict[str, Any]] = None,
+                    array_size: Optional[int] = None) -> pd.DataFrame:
+        """
+        Fetch query result row by row (fallback for oracledb < 3.0 or no pyarrow).
+        
+        Args:
+            conn: Database connection
+            query: SQL query statement
+            binds: Bind variable values
+            array_size: Rows per round trip for this query (None uses the default)
+            
+        Returns:
+            Query result as DataFrame
+        """
+        array_size = array_size or self.array_size
+        cursor = conn.cursor()
+        # prefetchrows = arraysize + 1 lets the execute round trip return the first batch
+        cursor.arraysize = array_size
+        cursor.prefetchrows = array_size + 1
+        cursor.execute(query, binds or {})
+        
+        # Get column names and, where the Oracle type fixes it, the column dtype
+        columns = [desc[0] for desc in cursor.description]
+        dtypes = [
+            # NUMBER(p, s) with s > 0 is always fetched as float
+            np.float64 if type_code == oracledb.DB_TYPE_NUMBER and (scale or 0) > 0
+            else _NUMPY_DTYPES.get(type_code)
+            for _, type_code, _, _, _, scale, _ in cursor.description
+        ]
+        
+        # Transpose each batch into per-column lists (CLOBs are already str, see fetch_lobs),
+        # so the DataFrame is built from columns without row-wise type inference
+        data = [[] for _ in columns]
+        while True:
+            rows = cursor.fetchmany(array_size)
+            if not rows:
+                break
+            for values, column in zip(data, zip(*rows)):
+                values.extend(column)
+        cursor.close()
+        
+        # Convert typed columns to NumPy arrays one at a time (None becomes NaN),
+        # releasing each list right away so only one column is held twice
+        for i, dtype in enumerate(dtypes):
+            if dtype is not None:
+                data[i] = np.asarray(data[i], dtype=dtype)
+        
+        return pd.DataFrame(dict(zip(columns, data)), columns=columns, copy=False)
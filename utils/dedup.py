@@ -0,0 +1,58 @@
+"""
+Text Deduplication Module
+Finds near-duplicate texts (reposts, wire syndication) with MinHash LSH
+"""
+import logging
+from typing import List, Sequence
+
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:  # datasketch is optional, near-dedup is skipped without it
+    MinHash = MinHashLSH = None
+
+logger = logging.getLogger(__name__)
+
+
+def near_duplicate_representatives(texts: Sequence[str], threshold: float = 0.9,
+                                   num_perm: int = 128, shingle_size: int = 5,
+                                   prefix_chars: int = 512) -> List[int]:
+    """
+    Map each text to the index of its near-duplicate representative.
+
+    Signatures are MinHash over character shingles of the first prefix_chars
+    characters. The first text seen in a bucket becomes its representative.
+
+    Args:
+        texts: Texts to deduplicate (should already be exact-deduplicated)
+        threshold: Jaccard similarity threshold for near-duplicates
+        num_perm: Number of MinHash permutations
+        shingle_size: Character shingle length
+        prefix_chars: Number of leading characters used for the signature
+
+    Returns:
+        List where item i is the representative index of texts[i] (i itself if unique)
+    """
+    representatives = list(range(len(texts)))
+
+    if MinHash is None:
+        logger.warning("datasketch is not installed, near-duplicate detection skipped")
+        return representatives
+
+    lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or not text:
+            continue
+
+        head = text[:prefix_chars]
+        shingles = {head[j:j + shingle_size] for j in range(max(1, len(head) - shingle_size + 1))}
+        minhash = MinHash(num_perm=num_perm)
+        minhash.update_batch([s.encode('utf-8') for s in shingles])
+
+        # Only representatives are inserted, so any match is a representative
+        matches = lsh.query(minhash)
+        if matches:
+            representatives[i] = min(int(key) for key in matches)
+        else:
+            lsh.insert(str(i), minhash)
+
+    return representatives
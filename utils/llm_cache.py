@@ -0,0 +1,120 @@
+"""
+LLM Cache Module
+Persistent SQLite cache of LLM responses, shared across daily runs
+"""
+import os
+import time
+import atexit
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Optional, Any
+
+from utils.utils import ensure_dir
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """SQLite-backed LLM response cache"""
+
+    def __init__(self, path: str, ttl_days: int = 14, commit_every: int = 100) -> None:
+        """
+        Initialize LLM cache.
+
+        Also serves as a per-request checkpoint: a rerun after a crash only
+        calls the LLM for prompts not stored yet.
+
+        Args:
+            path: SQLite database file path
+            ttl_days: Entries older than this are ignored and purged
+            commit_every: Number of puts grouped into one transaction
+        """
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only fsyncs at checkpoints; a crash loses at most the open batch
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        purged = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at <= ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+        self._conn.commit()
+        atexit.register(self.close)
+
+        logger.info("LLM cache initialized: %s, ttl: %s days, purged %s entries", path, ttl_days, purged)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build cache key from request parts.
+
+        Args:
+            parts: Values identifying the request (prompts, model, temperature, ...),
+                   joined with a unit separator so part boundaries are unambiguous
+
+        Returns:
+            Hex digest key
+        """
+        raw = "\x1f".join(str(part) for part in parts)
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.ttl_seconds)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Store value.
+
+        Args:
+            key: Cache key
+            value: Value to cache (raw LLM content)
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def flush(self) -> None:
+        """Commit pending puts."""
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        """Commit pending puts and close the underlying connection."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
@@ -2,27 +2,52 @@
 LLM Service Module
 Encapsulates Azure OpenAI API calls
 """
+import re
 import json
+import time
+import orjson
+import random
+import asyncio
 import logging
 import os
+import tempfile
+import itertools
+import httpx
 from pathlib import Path
-from typing import Dict, Any, Optional
-from openai import AzureOpenAI
+from typing import Dict, Any, Optional, List, Tuple, Union, Sequence, Callable
+from openai import (AzureOpenAI, AsyncAzureOpenAI, RateLimitError,
+                    APIConnectionError, InternalServerError)
 
 # Import utility functions
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.utils import load_prompt
+from utils.ratelimit import TokenBucket
+from utils.llm_cache import LLMCache
 
 logger = logging.getLogger(__name__)
 
+# A user prompt is one message, or several user messages sent in order
+# (invariant instructions first, so the provider can cache the prefix)
+UserPrompt = Union[str, Sequence[str]]
+
+# Outermost JSON object, for responses wrapped in code fences or prose
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
 
 class LLMService:
     """Azure OpenAI Service Wrapper"""
     
     def __init__(self, endpoint: str, api_key: str, api_version: str, 
                  model: str, max_tokens: int = 5000, temperature: float = 0.1,
-                 timeout: int = 60) -> None:
+                 timeout: int = 60, rpm: Optional[int] = None,
+                 tpm: Optional[int] = None, max_retries: int = 5,
+                 retry_base_delay: float = 1.0, retry_max_delay: float = 30.0,
+                 cache_path: Optional[str] = None,
+                 cache_ttl_days: int = 14, max_connections: int = 256,
+                 prompt_cache_key: Optional[str] = None,
+                 strict_json_schema: bool = False,
+                 extra_endpoints: Optional[List[Dict[str, str]]] = None) -> None:
         """
         Initialize LLM service.
         
@@ -34,7 +59,20 @@ class LLMService:
             max_tokens: Maximum number of tokens
             temperature: Temperature parameter
             timeout: Request timeout in seconds
-            prompts_dir: Directory containing prompt templates
+            rpm: Requests per minute budget (None disables proactive limiting)
+            tpm: Tokens per minute budget (None disables proactive limiting)
+            max_retries: Retries on rate limit / connection / timeout / 5xx errors
+            retry_base_delay: Base delay of exponential backoff in seconds
+            retry_max_delay: Upper bound of a single backoff delay in seconds
+            cache_path: SQLite response cache path (None disables caching)
+            cache_ttl_days: Days a cached response stays valid
+            max_connections: HTTP connection pool size of the async client
+            prompt_cache_key: Provider prompt-cache routing key (None omits it)
+            strict_json_schema: Use strict json_schema response_format when the
+                                caller provides a schema (else json_object)
+            extra_endpoints: Additional deployments of the same model, as dicts with
+                             endpoint, api_key and optional api_version; async calls
+                             are spread round-robin across all endpoints
         """
         self.client = AzureOpenAI(
             api_version=api_version,
@@ -42,47 +80,133 @@ class LLMService:
             api_key=api_key,
             timeout=timeout
         )
+        # Shared async clients for high-concurrency fan-out (one per endpoint)
+        # Retries are handled by acall_with_json_schema, not by the SDK
+        # HTTP/2 multiplexes concurrent requests over few TLS connections
+        endpoints = [{"endpoint": endpoint, "api_key": api_key}] + list(extra_endpoints or [])
+        self.async_clients = [
+            AsyncAzureOpenAI(
+                api_version=e.get("api_version", api_version),
+                azure_endpoint=e["endpoint"],
+                api_key=e["api_key"],
+                timeout=timeout,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=max_connections,
+                                        max_keepalive_connections=max_connections),
+                    timeout=httpx.Timeout(timeout, connect=5.0)
+                )
+            )
+            for e in endpoints
+        ]
+        # Round-robin rotation; a throttled endpoint is skipped until its cooldown ends
+        self._rotation = itertools.cycle(range(len(self.async_clients)))
+        self._cooldown_until = [0.0] * len(self.async_clients)
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
         self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        # rpm / tpm are per deployment, so each endpoint gets its own bucket
+        self.buckets = [TokenBucket(rpm, tpm) for _ in endpoints] if rpm and tpm else None
+        self.cache = LLMCache(cache_path, cache_ttl_days) if cache_path else None
+        self.prompt_cache_key = prompt_cache_key
+        self.strict_json_schema = strict_json_schema
+        # Token usage of the async calls, cached_tokens shows provider prefix-cache hits
+        self.usage = {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
         # self.prompts_dir = str(Path(__file__).parent.parent / "src" / prompts_program / "prompts")
 
-        logger.info(f"LLM service initialized, model: {model}, timeout: {timeout}s")
+        logger.info(f"LLM service initialized, model: {model}, timeout: {timeout}s, "
+                    f"endpoints: {len(endpoints)}")
+    
+    def _build_request(self, system_content: str, user_prompt: UserPrompt,
+                       max_tokens: Optional[int] = None,
+                       temperature: Optional[float] = None,
+                       response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Build chat completion request arguments.
+        
+        Args:
+            system_content: System prompt
+            user_prompt: User prompt, or user messages in order
+            max_tokens: Override default max tokens
+            temperature: Override default temperature
+            response_schema: {"name", "schema"} for strict structured output
+                             (used when strict_json_schema is enabled)
+            
+        Returns:
+            Keyword arguments for chat.completions.create
+        """
+        user_parts = [user_prompt] if isinstance(user_prompt, str) else user_prompt
+        if response_schema is not None and self.strict_json_schema:
+            # Decoding is constrained to the schema, output always validates
+            response_format = {"type": "json_schema", "json_schema": {**response_schema, "strict": True}}
+        else:
+            response_format = {"type": "json_object"}
+        request = {
+            "messages": [{"role": "system", "content": system_content}] + [
+                {"role": "user", "content": part} for part in user_parts
+            ],
+            "max_tokens": max_tokens or self.max_tokens,
+            "temperature": temperature if temperature is not None else self.temperature,
+            "top_p": 1.0,
+            "model": self.model,
+            "response_format": response_format,
+            "timeout": self.timeout
+        }
+        if self.prompt_cache_key:
+            request["prompt_cache_key"] = self.prompt_cache_key
+        return request
+    
+    @staticmethod
+    def _parse_response(response: Any) -> Dict[str, Any]:
+        """
+        Parse JSON content from chat completion response.
+        
+        Args:
+            response: Chat completion response
+            
+        Returns:
+            Parsed JSON response
+        """
+        content = response.choices[0].message.content
+        if content is None:
+            raise ValueError("LLM returned empty content")
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            match = _JSON_OBJECT_RE.search(content)
+            if match is None:
+                raise
+            return orjson.loads(match.group(0))
     
-    def call_with_json_schema(self, system_content: str, user_prompt: str, 
+    def call_with_json_schema(self, system_content: str, user_prompt: UserPrompt,
                              max_tokens: Optional[int] = None,
-                             temperature: Optional[float] = None) -> Dict[str, Any]:
+                             temperature: Optional[float] = None,
+                             response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Call LLM and return JSON formatted response.
         
         Args:
             system_content: System prompt
-            user_prompt: User prompt
+            user_prompt: User prompt, or user messages in order
             max_tokens: Override default max tokens
             temperature: Override default temperature
+            response_schema: {"name", "schema"} for strict structured output
+                             (used when strict_json_schema is enabled)
             
         Returns:
             Parsed JSON response
         """
         try:
             response = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=max_tokens or self.max_tokens,
-                temperature=temperature or self.temperature,
-                top_p=1.0,
-                model=self.model,
-                response_format={"type": "json_object"},
-                timeout=self.timeout
+                **self._build_request(system_content, user_prompt, max_tokens, temperature,
+                                      response_schema)
             )
-            
-            content = response.choices[0].message.content
-            if content is None:
-                raise ValueError("LLM returned empty content")
-            return json.loads(content)
+            return self._parse_response(response)
             
         except json.JSONDecodeError as e:
             logger.error(f"JSON parsing failed: {e}")
@@ -91,6 +215,254 @@ class LLMService:
             logger.error(f"LLM call failed: {e}")
             raise
     
+    async def acall_with_json_schema(self, system_content: str, user_prompt: UserPrompt,
+                                     max_tokens: Optional[int] = None,
+                                     temperature: Optional[float] = None,
+                                     bypass_cache: bool = False,
+                                     response_schema: Optional[Dict[str, Any]] = None,
+                                     validate: Optional[Callable[[Any], Any]] = None) -> Dict[str, Any]:
+        """
+        Call LLM asynchronously and return JSON formatted response.
+        
+        Only responses that pass validate are cached, so an invalid response
+        is never served again from the cache.
+        
+        Args:
+            system_content: System prompt
+            user_prompt: User prompt, or user messages in order
+            max_tokens: Override default max tokens
+            temperature: Override default temperature
+            bypass_cache: Skip the cache lookup (the fresh response is still stored)
+            response_schema: {"name", "schema"} for strict structured output
+                             (used when strict_json_schema is enabled)
+            validate: Compiled schema validator (raises JsonSchemaException)
+            
+        Returns:
+            Parsed JSON response
+        """
+        request = self._build_request(system_content, user_prompt, max_tokens, temperature,
+                                      response_schema)
+        user_parts = [user_prompt] if isinstance(user_prompt, str) else list(user_prompt)
+        
+        # Identical prompts (reposted news across days) are served from the cache
+        cache_key = None
+        if self.cache is not None:
+            cache_key = LLMCache.make_key(system_content, *user_parts, self.model, request["temperature"])
+            cached = None if bypass_cache else self.cache.get(cache_key)
+            if cached is not None:
+                result = orjson.loads(cached)
+                try:
+                    if validate is not None:
+                        validate(result)
+                    return result
+                except ValueError:
+                    # Stored before responses were validated, ask again
+                    logger.debug("Cached response failed validation, ignoring it")
+        
+        # Rough estimate: ~1 token per CJK character, plus the completion budget
+        est_tokens = len(system_content) + sum(map(len, user_parts)) + request["max_tokens"]
+        
+        for attempt in range(self.max_retries + 1):
+            client_idx, wait = self._pick_client()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if self.buckets is not None:
+                await self.buckets[client_idx].acquire(est_tokens)
+            try:
+                response = await self.async_clients[client_idx].chat.completions.create(**request)
+                self._record_usage(response)
+                result = self._parse_response(response)
+                
+            # APITimeoutError is a subclass of APIConnectionError
+            except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                if attempt == self.max_retries:
+                    logger.error(f"LLM call failed after {attempt + 1} attempts: {e}")
+                    raise
+                delay = self._retry_delay(attempt, e)
+                if isinstance(e, RateLimitError):
+                    # Cool the throttled endpoint down; the retry goes to another
+                    # endpoint, or waits for this one if it is the only one
+                    self._cooldown_until[client_idx] = time.monotonic() + delay
+                    logger.warning(f"LLM endpoint {client_idx} rate limited, cooling down {delay:.1f}s, "
+                                   f"retry {attempt + 1}/{self.max_retries}")
+                    continue
+                logger.warning(f"LLM call retryable error ({type(e).__name__}), "
+                               f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parsing failed: {e}")
+                raise
+            except Exception as e:
+                logger.error(f"LLM call failed: {e}")
+                raise
+            else:
+                # Raised to the caller (JsonSchemaException) before anything is cached
+                if validate is not None:
+                    validate(result)
+                if cache_key is not None:
+                    self.cache.put(cache_key, orjson.dumps(result).decode('utf-8'))
+                return result
+    
+    def _pick_client(self) -> Tuple[int, float]:
+        """
+        Pick the next async client round-robin, skipping endpoints in cooldown.
+        
+        Returns:
+            (client index, seconds to wait before using it)
+        """
+        now = time.monotonic()
+        for _ in range(len(self.async_clients)):
+            idx = next(self._rotation)
+            if self._cooldown_until[idx] <= now:
+                return idx, 0.0
+        
+        # All endpoints are cooling down, wait for the one that recovers first
+        idx = min(range(len(self.async_clients)), key=self._cooldown_until.__getitem__)
+        return idx, self._cooldown_until[idx] - now
+    
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Backoff delay before the next attempt.
+        
+        Exponential with jitter, capped at retry_max_delay, and never shorter
+        than the Retry-After the service asked for.
+        
+        Args:
+            attempt: Zero-based attempt number that just failed
+            error: Raised exception
+            
+        Returns:
+            Delay in seconds
+        """
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt + random.random())
+        
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                if "retry-after-ms" in response.headers:
+                    delay = max(delay, float(response.headers["retry-after-ms"]) / 1000)
+                elif "retry-after" in response.headers:
+                    delay = max(delay, float(response.headers["retry-after"]))
+            except ValueError:  # HTTP-date form, keep the computed delay
+                pass
+        
+        return delay
+    
+    def _record_usage(self, response: Any) -> None:
+        """
+        Accumulate token usage of a chat completion response into self.usage.
+        
+        Args:
+            response: Chat completion response
+        """
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.usage["prompt_tokens"] += usage.prompt_tokens or 0
+        self.usage["completion_tokens"] += usage.completion_tokens or 0
+        self.usage["cached_tokens"] += getattr(details, "cached_tokens", None) or 0
+    
+    def submit_batch(self, prompts: List[Tuple[str, str, UserPrompt]],
+                     max_tokens: Optional[int] = None,
+                     temperature: Optional[float] = None,
+                     response_schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Submit prompts as one Batch API job (asynchronous, ~50% token cost).
+        
+        Args:
+            prompts: List of (custom_id, system_content, user_prompt)
+            max_tokens: Override default max tokens
+            temperature: Override default temperature
+            response_schema: {"name", "schema"} for strict structured output
+                             (used when strict_json_schema is enabled)
+            
+        Returns:
+            Batch job id
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False,
+                                         encoding='utf-8') as f:
+            for custom_id, system_content, user_prompt in prompts:
+                body = self._build_request(system_content, user_prompt, max_tokens, temperature,
+                                           response_schema)
+                body.pop("timeout")
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/chat/completions",
+                    "body": body
+                }, ensure_ascii=False) + "\n")
+            jsonl_path = f.name
+        
+        try:
+            with open(jsonl_path, 'rb') as f:
+                input_file = self.client.files.create(file=f, purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/chat/completions",
+                completion_window="24h"
+            )
+        finally:
+            os.remove(jsonl_path)
+        
+        logger.info(f"Batch job submitted: {batch.id}, {len(prompts)} requests")
+        return batch.id
+    
+    def poll_batch(self, batch_id: str, interval: int = 30,
+                   validate: Optional[Callable[[Any], Any]] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Wait for a Batch API job to finish and collect its results.
+        
+        A failed job does not raise: it returns no results, so its requests
+        are reported missing and can be retried without losing other jobs.
+        
+        Args:
+            batch_id: Batch job id
+            interval: Polling interval in seconds
+            validate: Compiled schema validator applied to each response
+                      (raises JsonSchemaException, a ValueError)
+            
+        Returns:
+            {custom_id: parsed JSON response or None if the request failed};
+            custom_ids without any output are absent
+        """
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            logger.debug(f"Batch job {batch_id} status: {batch.status}")
+            time.sleep(interval)
+        
+        if batch.status == "failed":
+            logger.error(f"Batch job {batch_id} failed: {batch.errors}")
+        elif batch.status != "completed":
+            logger.warning(f"Batch job {batch_id} ended with status {batch.status}, "
+                           f"collecting partial results")
+        
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        if batch.output_file_id is None:
+            return results
+        
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            custom_id = record["custom_id"]
+            try:
+                body = record["response"]["body"]
+                result = orjson.loads(body["choices"][0]["message"]["content"])
+                if validate is not None:
+                    validate(result)
+                results[custom_id] = result
+            # JSONDecodeError and JsonSchemaException are ValueErrors
+            except (TypeError, KeyError, IndexError, ValueError) as e:
+                logger.warning(f"Batch request {custom_id} failed: {record.get('error') or e}")
+                results[custom_id] = None
+        
+        logger.info(f"Batch job {batch_id} finished, {len(results)} results")
+        return results
+    
     # def extract_stock_info(self, news_text: str) -> str:
     #     """
     #     Extract the stock information from news text.
@@ -0,0 +1,62 @@
+"""
+Rate Limiting Module
+Proactive request/token budgeting for Azure OpenAI calls
+"""
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token bucket limiting requests and tokens per minute"""
+
+    def __init__(self, rpm: int, tpm: int) -> None:
+        """
+        Initialize token bucket.
+
+        Args:
+            rpm: Requests per minute allowed by the deployment
+            tpm: Tokens per minute allowed by the deployment
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests_avail = float(rpm)
+        self.tokens_avail = float(tpm)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+        logger.info("Token bucket initialized, rpm: %s, tpm: %s", rpm, tpm)
+
+    def _refill(self) -> None:
+        """Refill capacity according to elapsed monotonic time."""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+
+        self.requests_avail = min(self.rpm, self.requests_avail + elapsed * self.rpm / 60.0)
+        self.tokens_avail = min(self.tpm, self.tokens_avail + elapsed * self.tpm / 60.0)
+
+    async def acquire(self, est_tokens: int = 0) -> None:
+        """
+        Wait until one request and est_tokens tokens are available, then consume them.
+
+        Args:
+            est_tokens: Estimated tokens (prompt + completion) of the request
+        """
+        # A single request can never need more than a full minute of budget
+        est_tokens = min(est_tokens, self.tpm)
+
+        # Waiters are served in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.requests_avail >= 1 and self.tokens_avail >= est_tokens:
+                    self.requests_avail -= 1
+                    self.tokens_avail -= est_tokens
+                    return
+
+                wait_requests = (1 - self.requests_avail) * 60.0 / self.rpm
+                wait_tokens = (est_tokens - self.tokens_avail) * 60.0 / self.tpm
+                await asyncio.sleep(max(wait_requests, wait_tokens, 0.01))
@@ -4,12 +4,77 @@ Includes logging configuration, date handling and other shared utilities
 """
 import os
 import yaml
+import queue
+import atexit
 import logging
+import logging.handlers
+from functools import lru_cache
 from datetime import date, timedelta
 from pathlib import Path
-from typing import Dict, Tuple, Optional, Any
+from typing import Dict, Tuple, Optional, Set, Any
 from dotenv import load_dotenv
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml, use the pure-Python loader
+    from yaml import SafeLoader as _YamlLoader
+
+# Background thread writing queued log records, see setup_logging
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+# Absolute paths already created by ensure_dir in this process
+_created_dirs: Set[str] = set()
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """File handler with a large write buffer, flushed on error records"""
+    
+    def __init__(self, filename: str, mode: str = 'a', encoding: Optional[str] = None,
+                 buffer_size: int = 262144, flush_level: int = logging.ERROR) -> None:
+        """
+        Initialize buffered file handler.
+        
+        Buffered lines are also flushed by logging.shutdown() at exit.
+        
+        Args:
+            filename: Log file path
+            mode: File open mode
+            encoding: File encoding
+            buffer_size: File buffer size in bytes
+            flush_level: Records at or above this level are flushed immediately
+        """
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        super().__init__(filename, mode=mode, encoding=encoding)
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record)
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg + self.terminator)
+            if record.levelno >= self.flush_level:
+                self.stream.flush()
+        except Exception:
+            self.handleError(record)
+
+
+def ensure_dir(path: str) -> None:
+    """
+    Create directory (and parents) if needed, once per path per process.
+    
+    Args:
+        path: Directory path
+    """
+    path = os.path.abspath(path)
+    if path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+
 
 def setup_logging(config: Dict[str, Any], log_dir: str = "./logs") -> None:
     """
@@ -19,7 +84,14 @@ def setup_logging(config: Dict[str, Any], log_dir: str = "./logs") -> None:
         config: Logging configuration
         log_dir: Log directory
     """
-    os.makedirs(log_dir, exist_ok=True)
+    global _log_listener
+    
+    # Skip collecting record attributes the formats never use
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
+    ensure_dir(log_dir)
     
     # Generate log filename
     log_file = os.path.join(
@@ -31,6 +103,12 @@ def setup_logging(config: Dict[str, Any], log_dir: str = "./logs") -> None:
     root_logger = logging.getLogger()
     
     # Clear existing handlers (avoid duplication)
+    if _log_listener is not None:
+        atexit.unregister(_log_listener.stop)
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
     if root_logger.handlers:
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
@@ -40,20 +118,33 @@ def setup_logging(config: Dict[str, Any], log_dir: str = "./logs") -> None:
     
     # Set format
     formatter = logging.Formatter(
-        config.get('format', '%(asctime)s - %(levelname)s - %(message)s')
+        config.get('format', '%(asctime)s - %(levelname)s - %(message)s'),
+        datefmt=config.get('datefmt', '%Y-%m-%dT%H:%M:%S')
     )
     
     # File handler
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler = BufferedFileHandler(
+        log_file,
+        encoding='utf-8',
+        buffer_size=config.get('file_buffer_size', 262144)
+    )
     file_handler.setLevel(config.get('level', 'INFO'))
     file_handler.setFormatter(formatter)
-    root_logger.addHandler(file_handler)
     
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(config.get('level', 'INFO'))
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    
+    # Callers only enqueue records; formatting and IO run on the listener thread
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _log_listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _log_listener.start()
+    # Registered after logging's own exit hook, so it runs first and drains the queue
+    atexit.register(_log_listener.stop)
     
     # Suppress third-party package logs
     logging.getLogger('openai').setLevel(logging.WARNING)
@@ -61,12 +152,14 @@ def setup_logging(config: Dict[str, Any], log_dir: str = "./logs") -> None:
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     
     # Test if logging works properly
-    root_logger.info(f"Logging system initialized, log file: {log_file}")
+    root_logger.info("Logging system initialized, log file: %s", log_file)
 
 
+@lru_cache(maxsize=None)
 def load_config(config_path: str = "./config/config.yaml") -> Dict[str, Any]:
     """
-    Load configuration file.
+    Load configuration file (cached, the same dict is returned for a path;
+    treat it as read-only).
     
     Args:
         config_path: Configuration file path
@@ -75,7 +168,7 @@ def load_config(config_path: str = "./config/config.yaml") -> Dict[str, Any]:
         Configuration dictionary
     """
     with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+        config = yaml.load(f, Loader=_YamlLoader)
     return config
 
 
@@ -88,12 +181,17 @@ def load_env_variables(env_path: str = "./config/.env") -> None:
     """
     if os.path.exists(env_path):
         load_dotenv(env_path)
-        logging.info(f"Environment variables loaded: {env_path}")
+        logging.info("Environment variables loaded: %s", env_path)
     else:
-        logging.warning(f".env file does not exist: {env_path}")
+        logging.warning(".env file does not exist: %s", env_path)
         logging.warning("Hint: Copy config/.env.example to config/.env and fill in credentials")
 
 
+def _format_date(d: date) -> str:
+    """Format date as YYYY/MM/DD (plain field formatting, no strftime/locale)."""
+    return f"{d.year:04d}/{d.month:02d}/{d.day:02d}"
+
+
 def get_date_range(days_back: Optional[int] = None) -> Tuple[str, str]:
     """
     Get date range (for data query).
@@ -118,15 +216,13 @@ def get_date_range(days_back: Optional[int] = None) -> Tuple[str, str]:
             date_bgn = today - timedelta(days=2)
             date_end = today - timedelta(days=1)
     
-    return (
-        date_bgn.strftime("%Y/%m/%d"),
-        date_end.strftime("%Y/%m/%d")
-    )
+    return _format_date(date_bgn), _format_date(date_end)
 
 
+@lru_cache(maxsize=None)
 def load_prompt(filename: str, prompts_dir: str = "./prompts") -> str:
     """
-    Load prompt from text file.
+    Load prompt from text file (cached, each file is read once per process).
     
     Args:
         filename: Prompt filename (with or without .txt extension)
@@ -144,8 +240,22 @@ def load_prompt(filename: str, prompts_dir: str = "./prompts") -> str:
         with open(filepath, 'r', encoding='utf-8') as f:
             return f.read()
     except FileNotFoundError:
-        logging.error(f"Prompt file not found: {filepath}")
+        logging.error("Prompt file not found: %s", filepath)
         raise
     except Exception as e:
-        logging.error(f"Failed to load prompt {filename}: {e}")
+        logging.error("Failed to load prompt %s: %s", filename, e)
         raise
+
+
+def save_csv(df: Any, filepath: str) -> None:
+    """
+    Save DataFrame as UTF-8 CSV with BOM (opens correctly in Excel).
+    
+    Single writer for all outputs, so the delivered file format does not
+    depend on the column types of a run.
+    
+    Args:
+        df: DataFrame to save
+        filepath: Output CSV path
+    """
+    df.to_csv(filepath, index=False, encoding='utf-8-sig')